@@ -2,17 +2,124 @@ import pandas as pd
 import time
 import random
 import os
+import re
+import asyncio
+import glob
+import threading
+import aiohttp
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from datetime import timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from selectolax.lexbor import LexborHTMLParser
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
 # Database CSV filename
 DATABASE_CSV = 'youtube_channels_database.csv'
 
+# Known column types, so the CSV parser doesn't have to infer them
+DATABASE_DTYPES = {
+    'Username': 'string',
+    'Subscribers': 'Int64',
+    'Total Views': 'Int64',
+    'Video Count': 'Int64',
+    'Avg Views Per Video': 'float64',
+    'Country': 'string',
+    'Channel URL': 'string',
+    'Channel_ID': 'string',
+    'Search Niche': 'string',
+    'Channel_Image_URL': 'string',
+    'Views_Last_28_Days': 'string',
+    'Subs_Last_28_Days': 'string',
+    'Estimated_Rev_Last_28_Days': 'string',
+    'Long_Views': 'string',
+    'Short_Views': 'string',
+    'ViewStats_Profile_URL': 'string'
+}
+
+# Progress checkpoints, only the newly scraped rows are written here until the final CSV save
+CHECKPOINT_DIR = 'viewstats_checkpoints'
+
+# ViewStats channel page
+VIEWSTATS_URL = "https://www.viewstats.com/{username}/channelytics"
+
+# ViewStats_Profile_URL values recorded when a channel couldn't be scraped
+FAIL_SENTINELS = frozenset({
+    "no viewstats page available",
+    "no username available",
+    "webdriver error",
+    "error occurred",
+    "no viewstats data available"
+})
+
+# Username from @handle, /c/ custom and legacy /user/ channel URLs
+_YT_USER_RE = re.compile(r'youtube\.com/(?:@([^/?#]+)|c/([^/?#]+)|user/([^/?#]+))')
+
+# Async HTTP scraping settings
+MAX_CONCURRENT_FETCHES = 20  # Channels fetched at the same time
+FETCH_RETRIES = 3  # Tries per page on 429/5xx responses
+FETCH_BATCH_SIZE = 50  # Channels per gather, progress is saved after each batch
+VIEWSTATS_CACHE = 'viewstats_cache'  # SQLite cache of fetched pages, shared between runs
+CACHE_EXPIRE_AFTER = timedelta(hours=24)
+HTTP_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+# Selenium fallback settings
+BROWSER_WORKERS = 6  # Chrome instances scraping JS-rendered pages in parallel
+VIEWS_TIMEOUT = 15  # Seconds to wait for the views data before giving up on a page
+POLL_INTERVAL = 0.2  # Seconds between checks for the views data
+CHROME_PROFILE_DIR = os.path.join(os.getcwd(), ".chrome_profile")  # Disk cache and cookies kept between runs
+CHROME_DISK_CACHE_BUDGET = 512 * 1024 * 1024  # Total Chrome disk cache, split evenly between the workers
+BLOCKED_URL_PATTERNS = [
+    # Static assets, only text is read
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.woff*", "*.css", "*.mp4",
+    # Third-party analytics, ads and widgets that hold up page load
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*facebook.com*", "*hotjar.com*", "*clarity.ms*", "*segment.io*", "*segment.com*",
+    "*intercom.io*", "*sentry.io*", "*posthog.com*"
+]
+
+# One driver per worker thread, created on first use and reused across channels
+_thread_local = threading.local()
+_drivers = []
+_drivers_lock = threading.Lock()
+
+# Reads every ViewStats field in one CDP round trip, same selectors as parse_viewstats_html.
+# Returns null while the previous page is still loaded
+EXTRACT_VIEWSTATS_JS = """(() => {
+    if (window.__viewstatsStale) return null;
+    const q = s => (document.querySelector(s) || {}).innerText || '';
+    let long = '', short = '';
+    document.querySelectorAll('.longs-vs-shorts-stats-value').forEach(block => {
+        const container = block.closest(':has(.vsvs-text-gray)');
+        const label = container && container.querySelector('.vsvs-text-gray');
+        if (!label) return;
+        if (label.innerText.includes('Long Views')) long = block.innerText;
+        else if (label.innerText.includes('Short Views')) short = block.innerText;
+    });
+    return {
+        views: q('p.card-value-views') || q("[class*='card-value'][class*='views']"),
+        subs: q('p.card-value'),
+        rev: q('p.card-rev'),
+        long: long,
+        short: short
+    };
+})()"""
+
+# Deep check for the not-tracked fallback, only used when the views data never shows up
+HAS_ERROR_INDICATORS_JS = """
+    const text = ((document.body && document.body.innerText) || '').toLowerCase();
+    return ['404', 'page not found', 'not found', 'error'].some(s => text.includes(s));
+"""
+
 
 def load_database():
     """Load the database CSV"""
@@ -21,26 +128,86 @@ def load_database():
         print("Please ensure you have a CSV file with YouTube channel data.")
         return None
 
-    df = pd.read_csv(DATABASE_CSV)
+    df = pd.read_csv(DATABASE_CSV, engine='pyarrow', dtype_backend='pyarrow', dtype=DATABASE_DTYPES)
     print(f"📊 Loaded database with {len(df)} channels")
     return df
 
 
 def save_database(df):
     """Save the updated database"""
-    df.to_csv(DATABASE_CSV, index=False)
+    df.to_csv(DATABASE_CSV, index=False, lineterminator='\n')
     print(f"💾 Database updated and saved")
 
 
+def save_checkpoint(df, results):
+    """Append the newly scraped rows to a checkpoint file instead of rewriting the whole CSV"""
+    if not results:
+        return
+
+    # Store each row's channel URL too, so a restore can find the channel again if the CSV changed
+    rows = []
+    for row in results:
+        channel_url = df.at[row['__idx'], 'Channel URL']
+        rows.append({**row, '__url': channel_url if isinstance(channel_url, str) else None})
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = os.path.join(CHECKPOINT_DIR, f"cp_{time.strftime('%Y%m%d_%H%M%S')}_{time.time_ns()}.parquet")
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def load_checkpoints(df):
+    """Restore rows from checkpoints left behind by an interrupted run, returns the number restored"""
+    files = sorted(glob.glob(os.path.join(CHECKPOINT_DIR, 'cp_*.parquet')))
+    if not files:
+        return 0
+
+    checkpoint = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    if '__url' not in checkpoint.columns:
+        checkpoint['__url'] = None
+
+    # Match rows by channel URL rather than position, the CSV may have been edited or reordered since
+    url_index = pd.Series(df.index, index=df['Channel URL'])
+    url_index = url_index[url_index.index.notna() & ~url_index.index.duplicated()]
+    checkpoint['__idx'] = checkpoint['__url'].map(url_index)
+    matched = checkpoint.dropna(subset=['__idx']).drop(columns='__url').astype({'__idx': 'int64'})
+
+    dropped = len(checkpoint) - len(matched)
+    if dropped:
+        print(f"⚠️ Dropped {dropped} checkpoint rows whose channel is no longer in the database")
+
+    restored = len(matched)
+    apply_results(df, matched.to_dict('records'))
+    print(f"♻️ Restored {restored} channels from {len(files)} checkpoint files")
+    return restored
+
+
+def clear_checkpoints():
+    """Remove checkpoint files once their rows are saved in the CSV"""
+    for path in glob.glob(os.path.join(CHECKPOINT_DIR, 'cp_*.parquet')):
+        os.remove(path)
+
+
 def get_channels_to_process(df):
-    """Get channels that need ViewStats processing"""
+    """Get the indices of channels that need ViewStats processing.
+    Channels with no ViewStats username are marked in place, returns (indices, number marked)"""
     # Check for channels where ViewStats_Profile_URL is empty or NaN
-    mask = (df['ViewStats_Profile_URL'].isna()) | (df['ViewStats_Profile_URL'] == '') | (
-            df['ViewStats_Profile_URL'] == 'N/A')
-    channels_to_process = df[mask].copy()
+    col = df['ViewStats_Profile_URL']
+    mask = col.isna() | col.isin(['', 'N/A'])
+
+    # Channels with only a /channel/ ID URL and no @handle can't be looked up, skip them before any fetch.
+    # Only the pending rows are checked, the rest of the table never needs the URL regex
+    resolvable = (df.loc[mask, 'Channel URL'].map(extract_username_from_channel_url).notna() |
+                  df.loc[mask, 'Username'].astype(str).str.startswith('@'))
+    unresolvable = resolvable.index[~resolvable]
+    skipped = len(unresolvable)
+    if skipped:
+        df.loc[unresolvable, 'ViewStats_Profile_URL'] = 'no username available'
+        print(f"⏭️  Skipping {skipped} channels without a ViewStats username")
+
+    indices = resolvable.index[resolvable].to_numpy()
 
-    print(f"🎯 Found {len(channels_to_process)} channels that need ViewStats processing")
-    return channels_to_process
+    print(f"🎯 Found {len(indices)} channels that need ViewStats processing")
+    return indices, skipped
 
 
 def extract_username_from_channel_url(channel_url):
@@ -48,37 +215,151 @@ def extract_username_from_channel_url(channel_url):
     if pd.isna(channel_url) or not channel_url:
         return None
 
-    # Handle different URL formats
-    if '@' in channel_url:
-        # Extract @username from URL like https://www.youtube.com/@username
-        parts = channel_url.split('@')
-        if len(parts) > 1:
-            username = parts[1].split('/')[0]  # Remove any trailing path
-            return username
-    elif '/channel/' in channel_url:
-        # For channel ID URLs, we can't easily get the username
-        # ViewStats might not work with channel IDs
+    # /channel/ ID URLs don't match, ViewStats doesn't work with channel IDs
+    match = _YT_USER_RE.search(channel_url)
+    return next((group for group in match.groups() if group), None) if match else None
+
+
+def empty_viewstats_data(profile_url):
+    """Create a ViewStats result with only the profile URL (or failure status) filled in"""
+    return {
+        "ViewStats_Profile_URL": profile_url,
+        "Views_Last_28_Days": "",
+        "Subs_Last_28_Days": "",
+        "Estimated_Rev_Last_28_Days": "",
+        "Long_Views": "",
+        "Short_Views": ""
+    }
+
+
+def get_viewstats_username(username, channel_url):
+    """Get the username to look up on ViewStats, falling back to the channel URL"""
+    if pd.isna(username) or not username or username == 'Unknown':
+        return extract_username_from_channel_url(channel_url)
+    return username
+
+
+def parse_viewstats_html(html, viewstats_url):
+    """Parse ViewStats data from page HTML, returns None if the data is rendered client-side"""
+    tree = LexborHTMLParser(html)
+
+    # Check if the channel is not tracked by ViewStats
+    title = tree.css_first("title")
+    if title is not None and "not found" in title.text().lower():
+        return empty_viewstats_data("no viewstats page available")
+    tree.strip_tags(["script", "style"])
+    body_text = tree.body.text() if tree.body is not None else ""
+    if "tracking this channel" in body_text:
+        return empty_viewstats_data("no viewstats page available")
+
+    # Views are the critical success indicator, same selectors as the Selenium path
+    views = tree.css_first("p.card-value-views") or tree.css_first("[class*='card-value'][class*='views']")
+    if views is None:
         return None
-    elif '/c/' in channel_url:
-        # Extract custom URL from /c/ format
-        parts = channel_url.split('/c/')
-        if len(parts) > 1:
-            username = parts[1].split('/')[0]
-            return username
-    elif '/user/' in channel_url:
-        # Extract from old /user/ format
-        parts = channel_url.split('/user/')
-        if len(parts) > 1:
-            username = parts[1].split('/')[0]
-            return username
 
-    return None
+    viewstats_data = empty_viewstats_data(viewstats_url)
+    viewstats_data["Views_Last_28_Days"] = views.text(strip=True)
+
+    subs = tree.css_first("p.card-value")
+    if subs is not None:
+        viewstats_data["Subs_Last_28_Days"] = subs.text(strip=True)
+
+    est_rev = tree.css_first("p.card-rev")
+    if est_rev is not None:
+        viewstats_data["Estimated_Rev_Last_28_Days"] = est_rev.text(strip=True)
+
+    # Long vs Short views, labelled by the nearest ancestor that has a label
+    for block in tree.css(".longs-vs-shorts-stats-value"):
+        label = None
+        container = block.parent
+        while container is not None and label is None:
+            label = container.css_first(".vsvs-text-gray")
+            container = container.parent
+        if label is None:
+            continue
+        if "Long Views" in label.text():
+            viewstats_data["Long_Views"] = block.text(strip=True)
+        elif "Short Views" in label.text():
+            viewstats_data["Short_Views"] = block.text(strip=True)
+
+    return viewstats_data
+
+
+async def fetch_viewstats_html(session, url):
+    """Fetch a ViewStats page, retrying 429/5xx responses with exponential backoff.
+    Returns (html, from_cache), html is None on 404"""
+    for attempt in range(FETCH_RETRIES):
+        async with session.get(url) as response:
+            from_cache = getattr(response, 'from_cache', False)
+            if response.status == 404:
+                return None, from_cache
+            if response.status != 429 and response.status < 500:
+                response.raise_for_status()
+                return await response.text(), from_cache
+
+        if attempt < FETCH_RETRIES - 1:
+            await asyncio.sleep(2 ** attempt)
+
+    raise aiohttp.ClientError(f"Giving up on {url} after {FETCH_RETRIES} tries (HTTP {response.status})")
+
+
+async def scrape_viewstats_data(session, semaphore, username, channel_url, row_index, total_channels):
+    """Scrape ViewStats data for a single channel over HTTP, returns None if it needs the Selenium fallback"""
+    print(f"Processing {row_index + 1}/{total_channels}: {username}")
+
+    username = get_viewstats_username(username, channel_url)
+    if not username:
+        print(f"  ❌ Cannot extract username - SKIPPING")
+        return empty_viewstats_data("no username available")
 
+    viewstats_url = VIEWSTATS_URL.format(username=username)
 
-def setup_driver():
+    try:
+        async with semaphore:
+            started = time.perf_counter()
+            html, from_cache = await fetch_viewstats_html(session, viewstats_url)
+
+            # Random delay (1-3 seconds) before this slot fetches the next channel, minus the time the
+            # request already took. Cache hits cost ViewStats nothing
+            delay = random.uniform(1, 3) - (time.perf_counter() - started)
+            if not from_cache and delay > 0:
+                await asyncio.sleep(delay)
+
+        if html is None:
+            print(f"  ❌ {username}: ViewStats page not found - SKIPPING")
+            return empty_viewstats_data("no viewstats page available")
+
+        viewstats_data = parse_viewstats_html(html, viewstats_url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"  ❌ {username}: HTTP error: {type(e).__name__}: {e}")
+        return empty_viewstats_data("error occurred")
+    except Exception as e:
+        # Anything else (bad encoding, unexpected markup) only fails this channel, not the whole batch
+        print(f"  ❌ {username}: Error: {type(e).__name__}: {e}")
+        return empty_viewstats_data("error occurred")
+
+    if viewstats_data is None:
+        print(f"  ⏳ {username}: data is rendered client-side, queued for the browser")
+        return None
+
+    if viewstats_data["ViewStats_Profile_URL"] == viewstats_url:
+        print(f"  ✅ SUCCESS for {username}: {viewstats_data['Views_Last_28_Days']} views")
+    else:
+        print(f"  ❌ {username}: channel not tracked by ViewStats - SKIPPING")
+    return viewstats_data
+
+
+def setup_driver(worker_id=0):
     """Setup Chrome driver with optimized options"""
+    # Each worker needs its own profile, Chrome locks a profile directory while it's in use
+    profile_dir = os.path.join(CHROME_PROFILE_DIR, f"worker-{worker_id}")
+    os.makedirs(profile_dir, exist_ok=True)
+
     options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument(f"--disk-cache-size={CHROME_DISK_CACHE_BUDGET // BROWSER_WORKERS}")
+    options.add_argument("--headless=new")  # No GUI, the scraper only reads text
+    options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
@@ -90,17 +371,15 @@ def setup_driver():
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-plugins")
     options.add_argument("--disable-images")  # Don't load images for faster loading
-    options.add_argument("--disable-web-security")
+    options.add_argument("--blink-settings=imagesEnabled=false")
     options.add_argument("--disable-features=VizDisplayCompositor")
 
     # Set page load strategy to 'eager' for faster loading
     options.page_load_strategy = 'eager'
 
-    # Uncomment the next line for headless mode (faster)
-    # options.add_argument("--headless")
-
     service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    # Reuse one HTTP connection to chromedriver for all commands instead of reconnecting per command
+    driver = webdriver.Chrome(service=service, options=options, keep_alive=True)
 
     # Set longer timeouts to handle slow loading pages
     driver.set_page_load_timeout(30)  # Increased timeout for page loads
@@ -109,6 +388,10 @@ def setup_driver():
     # Hide automation indicators
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
+    # Don't download stylesheets, fonts, images, media or third-party trackers
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    driver.execute_cdp_cmd("Network.enable", {})
+
     return driver
 
 
@@ -132,13 +415,10 @@ def check_if_channel_not_tracked(driver):
         except:
             pass
 
-        # Check for 404 or error indicators in page content
+        # Check for 404 or error indicators in page content, scanned in the browser so the
+        # whole body text isn't sent over the WebDriver connection
         try:
-            body_text = driver.find_element(By.TAG_NAME, "body").text.lower()
-            if ("404" in body_text or
-                    "page not found" in body_text or
-                    "not found" in body_text or
-                    "error" in body_text):
+            if driver.execute_script(HAS_ERROR_INDICATORS_JS):
                 return True, "Page contains error indicators"
         except:
             pass
@@ -149,150 +429,208 @@ def check_if_channel_not_tracked(driver):
         return True, f"Error checking page status: {str(e)}"
 
 
-def scrape_viewstats_data(driver, username, channel_url, row_index, total_channels):
-    """Scrape ViewStats data for a single channel"""
+def wait_for_viewstats_data(driver, timeout):
+    """Poll the page over CDP until the views data shows up, returns the extracted fields or None on timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # The navigation is still in progress, so the execution context can be torn down under the poll.
+        # Treat those errors like a page that isn't ready yet and keep polling
+        try:
+            response = driver.execute_cdp_cmd("Runtime.evaluate", {"expression": EXTRACT_VIEWSTATS_JS,
+                                                                    "returnByValue": True})
+        except WebDriverException:
+            response = None
+
+        if response and "exceptionDetails" not in response:
+            data = response.get("result", {}).get("value")
+            if data and data["views"]:
+                return data
+        time.sleep(POLL_INTERVAL)
+
+    return None
+
+
+def scrape_viewstats_data_with_driver(driver, username, channel_url, row_index, total_channels):
+    """Scrape ViewStats data for a single channel with Selenium, for pages that need JS rendering"""
     print(f"Processing {row_index + 1}/{total_channels}: {username}")
 
     # Try to extract a better username from the channel URL if needed
-    if not username or username == 'Unknown':
-        extracted_username = extract_username_from_channel_url(channel_url)
-        if extracted_username:
-            username = extracted_username
-        else:
-            print(f"  ❌ Cannot extract username - SKIPPING")
-            return {
-                "ViewStats_Profile_URL": "no username available",
-                "Views_Last_28_Days": "",
-                "Subs_Last_28_Days": "",
-                "Estimated_Rev_Last_28_Days": "",
-                "Long_Views": "",
-                "Short_Views": ""
-            }
-
-    viewstats_url = f"https://www.viewstats.com/{username}/channelytics"
+    username = get_viewstats_username(username, channel_url)
+    if not username:
+        print(f"  ❌ Cannot extract username - SKIPPING")
+        return empty_viewstats_data("no username available")
+
+    viewstats_url = VIEWSTATS_URL.format(username=username)
     print(f"  🔍 Navigating to: {viewstats_url}")
 
     try:
-        # Navigate to the page
-        driver.get(viewstats_url)
-
-        # Wait a bit for the page to load
-        time.sleep(3)
-
-        # Check if the channel is not tracked by ViewStats
-        is_not_tracked, reason = check_if_channel_not_tracked(driver)
-        if is_not_tracked:
-            print(f"  ❌ {reason} - SKIPPING")
-            return {
-                "ViewStats_Profile_URL": "no viewstats page available",
-                "Views_Last_28_Days": "",
-                "Subs_Last_28_Days": "",
-                "Estimated_Rev_Last_28_Days": "",
-                "Long_Views": "",
-                "Short_Views": ""
-            }
+        # Mark the current document so polling can't pick up the previous channel's data,
+        # then navigate over CDP without blocking until the page finishes loading
+        driver.execute_cdp_cmd("Runtime.evaluate", {"expression": "window.__viewstatsStale = true"})
+        navigation = driver.execute_cdp_cmd("Page.navigate", {"url": viewstats_url})
+        if navigation.get("errorText"):
+            raise WebDriverException(navigation["errorText"])
 
         # Initialize data storage
-        viewstats_data = {
-            "ViewStats_Profile_URL": viewstats_url,
-            "Views_Last_28_Days": "",
-            "Subs_Last_28_Days": "",
-            "Estimated_Rev_Last_28_Days": "",
-            "Long_Views": "",
-            "Short_Views": ""
-        }
-
-        # Step 1: Try to get the main views data (critical success indicator)
+        viewstats_data = empty_viewstats_data(viewstats_url)
+
+        # Poll for every field while the page loads, returns as soon as the views data (critical success indicator) appears
         print("  🔄 Looking for views data...")
-        try:
-            views_element = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "p.card-value-views"))
-            )
-            viewstats_data["Views_Last_28_Days"] = views_element.text.strip()
-            print(f"  ✅ Views found: {viewstats_data['Views_Last_28_Days']}")
-
-        except TimeoutException:
-            print(f"  ⏳ Views data taking longer to load, trying alternative selectors...")
-            # Try alternative selectors for views
-            try:
-                views_alt = driver.find_element(By.CSS_SELECTOR, "[class*='card-value'][class*='views']")
-                viewstats_data["Views_Last_28_Days"] = views_alt.text.strip()
-                print(f"  ✅ Views found (alt): {viewstats_data['Views_Last_28_Days']}")
-            except NoSuchElementException:
-                print(f"  ❌ No views data found after extended wait - SKIPPING")
-                viewstats_data["ViewStats_Profile_URL"] = "no viewstats data available"
-                return viewstats_data
-
-        # Step 2: Collection of remaining data with longer waits
-        print("  🔄 Collecting additional data...")
-
-        # Subscribers (try multiple selectors)
-        try:
-            # Wait for subscribers data
-            subs_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "p.card-value"))
-            )
-            viewstats_data["Subs_Last_28_Days"] = subs_element.text.strip()
-            print(f"    ✓ Subs: {viewstats_data['Subs_Last_28_Days']}")
-        except TimeoutException:
-            print("    ⏳ No subs data found")
-
-        # Revenue
-        try:
-            est_rev_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "p.card-rev"))
-            )
-            viewstats_data["Estimated_Rev_Last_28_Days"] = est_rev_element.text.strip()
-            print(f"    ✓ Revenue: {viewstats_data['Estimated_Rev_Last_28_Days']}")
-        except TimeoutException:
-            print("    ⏳ No revenue data found")
-
-        # Long vs Short views
-        try:
-            print("    🔄 Looking for long/short views data...")
-            stats_blocks = WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".longs-vs-shorts-stats-value"))
-            )
-
-            for block in stats_blocks:
-                try:
-                    parent = block.find_element(By.XPATH, "..")
-                    label = parent.find_element(By.CLASS_NAME, "vsvs-text-gray").text
-                    if "Long Views" in label:
-                        viewstats_data["Long_Views"] = block.text.strip()
-                        print(f"    ✓ Long views: {viewstats_data['Long_Views']}")
-                    elif "Short Views" in label:
-                        viewstats_data["Short_Views"] = block.text.strip()
-                        print(f"    ✓ Short views: {viewstats_data['Short_Views']}")
-                except:
-                    continue
-
-        except TimeoutException:
-            print("    ⏳ No long/short views data found")
+        data = wait_for_viewstats_data(driver, VIEWS_TIMEOUT)
+        if data is None:
+            # Only check if the channel is not tracked by ViewStats when the data doesn't show up
+            is_not_tracked, reason = check_if_channel_not_tracked(driver)
+            if is_not_tracked:
+                print(f"  ❌ {reason} - SKIPPING")
+                return empty_viewstats_data("no viewstats page available")
+
+            print(f"  ❌ No views data found after extended wait - SKIPPING")
+            viewstats_data["ViewStats_Profile_URL"] = "no viewstats data available"
+            return viewstats_data
+
+        # We have what we need, don't wait for the rest of the page (trackers, lazy widgets) to finish
+        driver.execute_cdp_cmd("Page.stopLoading", {})
+
+        viewstats_data.update({
+            "Views_Last_28_Days": data["views"].strip(),
+            "Subs_Last_28_Days": data["subs"].strip(),
+            "Estimated_Rev_Last_28_Days": data["rev"].strip(),
+            "Long_Views": data["long"].strip(),
+            "Short_Views": data["short"].strip()
+        })
+        print(f"  ✅ Views: {viewstats_data['Views_Last_28_Days']} | Subs: {viewstats_data['Subs_Last_28_Days']} | "
+              f"Revenue: {viewstats_data['Estimated_Rev_Last_28_Days']} | Long: {viewstats_data['Long_Views']} | "
+              f"Short: {viewstats_data['Short_Views']}")
 
         print(f"  ✅ SUCCESS for {username}")
         return viewstats_data
 
     except WebDriverException as e:
         print(f"  ❌ WebDriver error: {e}")
-        return {
-            "ViewStats_Profile_URL": "webdriver error",
-            "Views_Last_28_Days": "",
-            "Subs_Last_28_Days": "",
-            "Estimated_Rev_Last_28_Days": "",
-            "Long_Views": "",
-            "Short_Views": ""
-        }
+        return empty_viewstats_data("webdriver error")
     except Exception as e:
         print(f"  ❌ Error: {type(e).__name__}: {e}")
-        return {
-            "ViewStats_Profile_URL": "error occurred",
-            "Views_Last_28_Days": "",
-            "Subs_Last_28_Days": "",
-            "Estimated_Rev_Last_28_Days": "",
-            "Long_Views": "",
-            "Short_Views": ""
-        }
+        return empty_viewstats_data("error occurred")
+
+
+def get_thread_driver():
+    """Get the current worker thread's driver, creating it on first use"""
+    driver = getattr(_thread_local, 'driver', None)
+    if driver is None:
+        # Start drivers one at a time so workers don't race on the chromedriver download
+        with _drivers_lock:
+            driver = setup_driver(worker_id=len(_drivers))
+            _drivers.append(driver)
+        _thread_local.driver = driver
+    return driver
+
+
+def quit_drivers():
+    """Close every worker thread's browser"""
+    with _drivers_lock:
+        for driver in _drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        _drivers.clear()
+
+
+def scrape_one(job, row_index, total_channels):
+    """Scrape a single channel on the current worker thread's driver"""
+    original_index, username, channel_url = job
+    driver = get_thread_driver()
+    started = time.perf_counter()
+    viewstats_data = scrape_viewstats_data_with_driver(driver, username, channel_url, row_index, total_channels)
+
+    # Random delay between requests (1-3 seconds), minus the time the page already took
+    delay = random.uniform(1, 3) - (time.perf_counter() - started)
+    if delay > 0:
+        print(f"  ⏳ Delay: {delay:.1f}s before next channel...")
+        time.sleep(delay)
+
+    return original_index, viewstats_data
+
+
+def record_viewstats_data(results, original_index, viewstats_data, counts):
+    """Buffer a channel's ViewStats data and update the result counters"""
+    results.append({'__idx': original_index, **viewstats_data})
+
+    counts['processed'] += 1
+
+    if viewstats_data["ViewStats_Profile_URL"] in FAIL_SENTINELS:
+        counts['failed'] += 1
+    else:
+        counts['successful'] += 1
+
+
+def apply_results(df, results):
+    """Write buffered ViewStats results to the dataframe in one vectorized update"""
+    if not results:
+        return
+
+    updates = pd.DataFrame(results).set_index('__idx')
+    df.loc[updates.index, updates.columns] = updates.values
+    results.clear()
+
+
+async def scrape_channels_over_http(df, jobs, results, counts):
+    """Scrape channels concurrently over HTTP, returns the jobs that need the Selenium fallback"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=30)
+    browser_jobs = []
+
+    # Pages (including 404s) are cached on disk, so reruns within a day skip channels already fetched
+    cache = SQLiteBackend(VIEWSTATS_CACHE, expire_after=CACHE_EXPIRE_AFTER, allowed_codes=(200, 404),
+                          cache_control=True)
+
+    async with CachedSession(cache=cache, connector=connector, timeout=timeout, headers=HTTP_HEADERS) as session:
+        for start in range(0, len(jobs), FETCH_BATCH_SIZE):
+            batch = jobs[start:start + FETCH_BATCH_SIZE]
+            batch_results = await asyncio.gather(*[
+                scrape_viewstats_data(session, semaphore, username, channel_url, start + i, len(jobs))
+                for i, (_, username, channel_url) in enumerate(batch)
+            ])
+
+            for job, viewstats_data in zip(batch, batch_results):
+                if viewstats_data is None:
+                    browser_jobs.append(job)
+                else:
+                    record_viewstats_data(results, job[0], viewstats_data, counts)
+
+            # Checkpoint progress after every batch
+            save_checkpoint(df, results)
+            apply_results(df, results)
+            print(f"  💾 Progress saved at {start + len(batch)} records")
+
+    return browser_jobs
+
+
+def scrape_channels_with_browser(df, jobs, results, counts):
+    """Scrape channels whose ViewStats data is only rendered by JavaScript using a pool of Selenium workers"""
+    workers = min(BROWSER_WORKERS, len(jobs))
+    print(f"🌐 {len(jobs)} channels need a browser, starting {workers} Selenium workers...")
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        futures = [executor.submit(scrape_one, job, idx, len(jobs)) for idx, job in enumerate(jobs)]
+
+        # Results are only written to the dataframe from the main thread
+        for done, future in enumerate(as_completed(futures), 1):
+            original_index, viewstats_data = future.result()
+            record_viewstats_data(results, original_index, viewstats_data, counts)
+
+            # Checkpoint progress every 10 records
+            if done % 10 == 0:
+                save_checkpoint(df, results)
+                apply_results(df, results)
+                print(f"  💾 Progress saved at {done} records")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+        # Close browsers
+        quit_drivers()
 
 
 def process_viewstats_data():
@@ -317,73 +655,46 @@ def process_viewstats_data():
             df[col] = ''
         df[col] = df[col].astype('object')  # Allow any data type
 
+    # Pick up where an interrupted run left off
+    restored = load_checkpoints(df)
+
     # Get channels that need processing
-    channels_to_process = get_channels_to_process(df)
+    indices, skipped = get_channels_to_process(df)
 
-    if len(channels_to_process) == 0:
+    if len(indices) == 0:
+        if restored or skipped:
+            save_database(df)
+            clear_checkpoints()
         print("✅ All channels already have ViewStats data processed!")
         return
 
-    print(f"🚀 Starting ViewStats scraping for {len(channels_to_process)} channels...")
-
-    # Setup driver
-    driver = setup_driver()
+    print(f"🚀 Starting ViewStats scraping for {len(indices)} channels...")
 
-    processed_count = 0
-    successful_count = 0
-    failed_count = 0
+    # (original index, username, channel URL) for every channel to scrape
+    jobs = [(idx, df.at[idx, 'Username'], df.at[idx, 'Channel URL']) for idx in indices]
+    results = []  # Scraped rows waiting to be written to the dataframe
+    counts = {'processed': 0, 'successful': 0, 'failed': 0}
 
     try:
-        for idx, (_, row) in enumerate(channels_to_process.iterrows()):
-            username = row.get('Username', 'Unknown')
-            channel_url = row.get('Channel URL', '')
-
-            # Get the original index in the full dataframe
-            original_index = row.name
-
-            # Scrape ViewStats data
-            viewstats_data = scrape_viewstats_data(driver, username, channel_url, idx, len(channels_to_process))
-
-            # Update the main dataframe
-            for key, value in viewstats_data.items():
-                df.at[original_index, key] = value
-
-            processed_count += 1
-
-            if (viewstats_data["ViewStats_Profile_URL"] != "no viewstats page available" and
-                    viewstats_data["ViewStats_Profile_URL"] != "no username available" and
-                    viewstats_data["ViewStats_Profile_URL"] != "webdriver error" and
-                    viewstats_data["ViewStats_Profile_URL"] != "error occurred" and
-                    viewstats_data["ViewStats_Profile_URL"] != "no viewstats data available"):
-                successful_count += 1
-            else:
-                failed_count += 1
-
-            # Random delay between requests (1-3 seconds)
-            delay = random.uniform(1, 3)
-            print(f"  ⏳ Delay: {delay:.1f}s before next channel...")
-            time.sleep(delay)
-
-            # Save progress every 10 records
-            if (idx + 1) % 10 == 0:
-                save_database(df)
-                print(f"  💾 Progress saved at {idx + 1} records")
+        # Fetch pages concurrently, only JS-rendered pages fall back to a browser
+        browser_jobs = asyncio.run(scrape_channels_over_http(df, jobs, results, counts))
+        if browser_jobs:
+            scrape_channels_with_browser(df, browser_jobs, results, counts)
 
     except KeyboardInterrupt:
         print("\n⚠️ Process interrupted by user")
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
     finally:
-        # Close browser
-        driver.quit()
-
-        # Save final results
+        # Save final results, the checkpoints are no longer needed once they're in the CSV
+        apply_results(df, results)
         save_database(df)
+        clear_checkpoints()
 
     print(f"\n✅ ViewStats scraping complete!")
-    print(f"📊 Processed: {processed_count} channels")
-    print(f"✅ Successful: {successful_count} channels")
-    print(f"❌ Failed/No page: {failed_count} channels")
+    print(f"📊 Processed: {counts['processed']} channels")
+    print(f"✅ Successful: {counts['successful']} channels")
+    print(f"❌ Failed/No page: {counts['failed']} channels")
     print(f"💾 Database updated: {DATABASE_CSV}")
 
 
@@ -1,8 +1,12 @@
 import pandas as pd
-import time
-from googleapiclient.discovery import build
+import asyncio
+import csv
+import functools
+import aiohttp
+import orjson
 import re
-from collections import Counter
+import sys
+from collections import Counter, deque
 from dotenv import load_dotenv
 import os
 
@@ -11,10 +15,18 @@ load_dotenv()
 
 # Get API keys
 API_KEY = os.getenv('YOUTUBE_API_KEY')  # General API key variable name
-YOUTUBE_API = build('youtube', 'v3', developerKey=API_KEY)
+YOUTUBE_API_URL = 'https://www.googleapis.com/youtube/v3'
+
+# Concurrent API request settings
+MAX_CONCURRENT_REQUESTS = 4  # Requests in flight at once, keeps us under the per-project QPS
+MAX_RETRIES = 3  # Tries per request on rate limits and server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHANNELS_PER_BATCH = 50  # Most IDs a single channels.list call accepts
+KEEPALIVE_TIMEOUT = 60  # Seconds an idle API connection stays open for reuse
 
 # Database CSV filename
 DATABASE_CSV = 'youtube_channels_database.csv'
+WRITE_BUFFER_SIZE = 1024 * 1024  # Larger write buffer for saving the CSV
 
 # Statistics tracking
 stats = {
@@ -24,11 +36,13 @@ stats = {
     'skip_reasons': Counter(),
     'api_calls_search': 0,
     'api_calls_batch': 0,
-    'quota_used': 0
+    'quota_used': 0,
+    'quota_saved_by_cache': 0,
+    'pages_short_circuited': 0
 }
 
 # Define all possible columns for the database
-ALL_COLUMNS = [
+ALL_COLUMNS = (
     'Username',
     'Subscribers',
     'Total Views',
@@ -36,6 +50,7 @@ ALL_COLUMNS = [
     'Avg Views Per Video',
     'Country',
     'Channel URL',
+    'Channel_ID',
     'Search Niche',
     'Channel_Image_URL',
     'Views_Last_28_Days',
@@ -44,71 +59,184 @@ ALL_COLUMNS = [
     'Long_Views',
     'Short_Views',
     'ViewStats_Profile_URL'
-]
+)
+
+# ViewStats columns start empty on new rows and are filled in by the ViewStats scraper
+_VIEWSTATS_EMPTY = {
+    'Views_Last_28_Days': '',
+    'Subs_Last_28_Days': '',
+    'Estimated_Rev_Last_28_Days': '',
+    'Long_Views': '',
+    'Short_Views': '',
+    'ViewStats_Profile_URL': ''
+}
+
+# Fixed column types, so loading doesn't have to infer them
+COLUMN_DTYPES = {
+    'Username': 'string',
+    'Subscribers': 'Int64',
+    'Total Views': 'Int64',
+    'Video Count': 'Int64',
+    'Avg Views Per Video': 'float64',
+    'Country': 'category',  # A few hundred distinct values, stored as small integer codes
+    'Channel URL': 'string',
+    'Channel_ID': 'string',
+    'Search Niche': 'string',
+    'Channel_Image_URL': 'string',
+    'Views_Last_28_Days': 'string',
+    'Subs_Last_28_Days': 'string',
+    'Estimated_Rev_Last_28_Days': 'string',
+    'Long_Views': 'string',
+    'Short_Views': 'string',
+    'ViewStats_Profile_URL': 'string'
+}
+
+# Channel ID from /channel/ URLs, used to backfill Channel_ID for older rows
+CHANNEL_ID_RE = re.compile(r'/channel/(UC[\w-]+)')
+
+# Filename cleaning, a translate table for ASCII text and a regex for anything else
+_SAFE_TRANS = str.maketrans({chr(c): '_' for c in range(128) if not (chr(c).isalnum() or chr(c) == '_')})
+_SAFE_RE = re.compile(r'[^a-zA-Z0-9_]')
 
 
 def load_or_create_database():
-    """Load existing database or create new one with all columns"""
+    """Load existing database or create new one with all columns, returns (df, indexes)"""
     if os.path.exists(DATABASE_CSV):
-        df = pd.read_csv(DATABASE_CSV)
+        df = pd.read_csv(DATABASE_CSV, dtype=COLUMN_DTYPES)
         print(f"📊 Loaded existing database with {len(df)} channels")
 
         # Add missing columns if they don't exist
-        for col in ALL_COLUMNS:
-            if col not in df.columns:
-                df[col] = ''
-
-        # Reorder columns to match ALL_COLUMNS
-        df = df[ALL_COLUMNS]
-        return df
+        existing = set(df.columns)
+        missing = [col for col in ALL_COLUMNS if col not in existing]
+        for col in missing:
+            df[col] = pd.Series(index=df.index, dtype=COLUMN_DTYPES[col])
+
+        # Reorder columns to match ALL_COLUMNS, only when the file's layout differs
+        if missing or tuple(df.columns) != ALL_COLUMNS:
+            df = df[list(ALL_COLUMNS)]
+
+        # Backfill channel IDs that can be read from /channel/ URLs
+        missing_id = df['Channel_ID'].isna() | (df['Channel_ID'] == '')
+        df.loc[missing_id, 'Channel_ID'] = df.loc[missing_id, 'Channel URL'].str.extract(CHANNEL_ID_RE, expand=False)
     else:
         print("📝 Creating new database...")
-        df = pd.DataFrame(columns=ALL_COLUMNS)
-        return df
+        df = pd.DataFrame(columns=list(ALL_COLUMNS)).astype(COLUMN_DTYPES)
+
+    # Lowercase usernames once for case-insensitive lookups, this column is never saved
+    df['_username_lower'] = df['Username'].str.lower()
+
+    return df, build_indexes(df)
+
+
+def build_indexes(df):
+    """Build lookup dicts from channel keys to row index, plus each row's set of niche words"""
+    indexes = {'channel_id': {}, 'username': {}, 'url': {}, 'niche_words': {}}
+    add_to_indexes(indexes, df)
+    return indexes
+
+
+def add_to_indexes(indexes, df):
+    """Add the rows of df to the lookup dicts, keeping the first row seen for each key"""
+    for idx, channel_id, username_lower, channel_url, niches in zip(df.index, df['Channel_ID'], df['_username_lower'],
+                                                                    df['Channel URL'], df['Search Niche']):
+        indexes['niche_words'][idx] = set(niches.lower().split()) if isinstance(niches, str) else set()
+        if isinstance(channel_id, str) and channel_id:
+            indexes['channel_id'].setdefault(channel_id, idx)
+        if isinstance(username_lower, str):
+            indexes['username'].setdefault(username_lower, idx)
+        if isinstance(channel_url, str):
+            indexes['url'].setdefault(channel_url, idx)
+
 
+def save_database(df, new_rows=None, updated=False):
+    """Save database to CSV, only appending the new row dicts when no existing rows changed"""
+    if not updated and new_rows and os.path.exists(DATABASE_CSV) and csv_header_matches():
+        with open(DATABASE_CSV, 'a', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            _fast_append(new_rows, f)
+        print(f"💾 Database saved with {len(df)} channels ({len(new_rows)} appended)")
+        return
 
-def save_database(df):
-    """Save database to CSV"""
-    df.to_csv(DATABASE_CSV, index=False)
+    with open(DATABASE_CSV, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        df.to_csv(f, columns=list(ALL_COLUMNS), index=False, lineterminator='\n')
     print(f"💾 Database saved with {len(df)} channels")
 
 
-def find_existing_channel(username, channel_url, df):
+def _csv_field(value):
+    """Format one CSV field, numbers as-is and non-empty text quoted with embedded quotes doubled"""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"' if value else ''
+    if value is None:
+        return ''
+    return str(value)
+
+
+def _fast_append(rows, f):
+    """Write row dicts to an open CSV file in ALL_COLUMNS order, without going through DataFrame.to_csv"""
+    f.write(''.join(','.join([_csv_field(row[col]) for col in ALL_COLUMNS]) + '\n' for row in rows))
+
+
+def csv_header_matches():
+    """Check that the CSV on disk has the current column layout, so rows can be appended to it"""
+    with open(DATABASE_CSV, newline='', encoding='utf-8') as f:
+        return tuple(next(csv.reader(f), ())) == ALL_COLUMNS
+
+
+def find_existing_channel(username, channel_url, user_index, url_index):
     """Find existing channel in database and return its index"""
-    # Check by username (case-insensitive)
-    username_match = df['Username'].str.lower() == username.lower()
+    # Check by username (case-insensitive), then by channel URL
+    existing_index = user_index.get(username.lower())
+    if existing_index is None:
+        existing_index = url_index.get(channel_url)
+    return existing_index
 
-    # Check by channel URL
-    url_match = df['Channel URL'] == channel_url
 
-    # Return the index of the first match found
-    combined_match = username_match | url_match
-    if combined_match.any():
-        return df[combined_match].index[0]
-    return None
+def update_existing_niche(pending_niche_updates, niche_words, existing_index, niche):
+    """Queue the niche for an existing channel's niches, returns True if anything changed"""
+    updated_niches = add_niche_to_existing(existing_index, niche, niche_words)
 
+    if updated_niches is not None:
+        pending_niche_updates[existing_index] = updated_niches
+        return True
+    return False
 
-def add_niche_to_existing(existing_niches, new_niche):
-    """Add new niche to existing niches, avoiding duplicates"""
-    if pd.isna(existing_niches) or existing_niches == '':
-        return new_niche
 
-    # Split existing niches into words
-    existing_words = set(existing_niches.lower().split())
-    new_words = set(new_niche.lower().split())
+def add_niche_to_existing(idx, new_niche, niche_words):
+    """Add new niche words to a row's niches, returns the updated niches or None if nothing was new"""
+    # Only words the row doesn't have yet
+    new_words = set(new_niche.lower().split()) - niche_words[idx]
+    if not new_words:
+        return None
 
-    # Find truly new words that aren't already present
-    unique_new_words = new_words - existing_words
+    niche_words[idx] |= new_words
+    return ' '.join(sorted(niche_words[idx]))
 
-    if unique_new_words:
-        # Add the new unique words to the existing niches
-        return existing_niches + ' ' + ' '.join(sorted(unique_new_words))
-    else:
-        # No new words to add
-        return existing_niches
+
+def with_backoff(func):
+    """Retry an API coroutine on rate limits and server errors with exponential backoff, honouring Retry-After"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return await func(*args, **kwargs)
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUSES or attempt == MAX_RETRIES - 1:
+                    raise
+                retry_after = e.headers.get('Retry-After') if e.headers else None
+                await asyncio.sleep(int(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt)
+    return wrapper
 
 
-def search_channels_by_keyword(query, page_token=None, max_results=50):
+@with_backoff
+async def api_get(session, semaphore, endpoint, params):
+    """Call a YouTube Data API endpoint and return the JSON response"""
+    async with semaphore:
+        async with session.get(f'{YOUTUBE_API_URL}/{endpoint}', params={**params, 'key': API_KEY}) as response:
+            response.raise_for_status()
+            # Parse the raw bytes with orjson, skipping the text decode and the stdlib json parser
+            return orjson.loads(await response.read())
+
+
+async def search_channels_by_keyword(session, semaphore, query, page_token=None, max_results=50):
     """Search for channels by keyword/niche using YouTube API"""
     params = {
         'part': 'snippet',
@@ -122,34 +250,36 @@ def search_channels_by_keyword(query, page_token=None, max_results=50):
     if page_token:
         params['pageToken'] = page_token
 
-    request = YOUTUBE_API.search().list(**params)
-    response = request.execute()
+    response = await api_get(session, semaphore, 'search', params)
     stats['api_calls_search'] += 1
     stats['quota_used'] += 100  # Search calls cost 100 units
     return response
 
 
-def get_channels_batch_optimized(channel_ids):
-    """Optimized batch fetching of channel details"""
+def count_batches(channel_ids):
+    """Number of channels.list calls needed for the given channel IDs"""
+    return (len(channel_ids) + CHANNELS_PER_BATCH - 1) // CHANNELS_PER_BATCH
+
+
+async def get_channels_batch_optimized(session, semaphore, channel_ids):
+    """Optimized batch fetching of channel details, all batches are requested concurrently"""
     if not channel_ids:
         return []
 
-    batch_size = 50
-    all_channels = []
+    batch_size = CHANNELS_PER_BATCH
+    n_batches = count_batches(channel_ids)
+    responses = await asyncio.gather(*[
+        api_get(session, semaphore, 'channels', {'part': 'snippet,statistics',
+                                                 'id': ','.join(channel_ids[i:i + batch_size])})
+        for i in range(0, len(channel_ids), batch_size)
+    ])
 
-    for i in range(0, len(channel_ids), batch_size):
-        batch_ids = channel_ids[i:i + batch_size]
-        request = YOUTUBE_API.channels().list(
-            part='snippet,statistics',
-            id=','.join(batch_ids)
-        )
-        response = request.execute()
+    all_channels = []
+    for response in responses:
         all_channels.extend(response.get('items', []))
-        stats['api_calls_batch'] += 1
-        stats['quota_used'] += 1  # Channel details cost 1 unit
 
-        if i + batch_size < len(channel_ids):
-            time.sleep(0.1)  # Small delay between batches
+    stats['api_calls_batch'] += n_batches
+    stats['quota_used'] += n_batches  # Channel details cost 1 unit per batch
 
     return all_channels
 
@@ -218,149 +348,271 @@ def process_channel_data(channel_item):
         return None
 
 
+def filter_channel_batch(batch_details, min_subs, max_subs, country_filter):
+    """Apply the subscriber and country filters to a whole batch of channels, returns two lists of booleans"""
+    if not batch_details:
+        return [], []
+
+    batch_df = pd.DataFrame({
+        'subs': [channel_details['subscribers'] for channel_details in batch_details],
+        'country': [channel_details['country'] for channel_details in batch_details]
+    })
+
+    subs_mask = batch_df['subs'].between(min_subs, max_subs)
+    if country_filter:
+        country_mask = batch_df['country'].str.upper() == country_filter.upper()
+    else:
+        country_mask = pd.Series(True, index=batch_df.index)
+
+    return subs_mask.tolist(), country_mask.tolist()
+
+
 def create_database_row(channel_details, niche):
     """Create a new row for the database with all columns"""
     video_count = channel_details['video_count']
     total_views = channel_details['total_views']
     avg_views_per_video = total_views / video_count if video_count > 0 else 0
 
-    # Create row with all columns, populate YouTube data and leave ViewStats data empty
-    row = {}
-    for col in ALL_COLUMNS:
-        if col == 'Username':
-            row[col] = channel_details['username']
-        elif col == 'Subscribers':
-            row[col] = channel_details['subscribers']
-        elif col == 'Total Views':
-            row[col] = total_views
-        elif col == 'Video Count':
-            row[col] = video_count
-        elif col == 'Avg Views Per Video':
-            row[col] = round(avg_views_per_video, 2)
-        elif col == 'Country':
-            row[col] = channel_details['country']
-        elif col == 'Channel URL':
-            row[col] = channel_details['channel_url']
-        elif col == 'Search Niche':
-            row[col] = niche
-        elif col == 'Channel_Image_URL':
-            row[col] = channel_details['channel_image_url']
-        else:
-            # ViewStats columns - leave empty for now
-            row[col] = ''
+    # Populate YouTube data and leave ViewStats data empty
+    return {
+        'Username': channel_details['username'],
+        'Subscribers': channel_details['subscribers'],
+        'Total Views': total_views,
+        'Video Count': video_count,
+        'Avg Views Per Video': round(avg_views_per_video, 2),
+        'Country': channel_details['country'],
+        'Channel URL': channel_details['channel_url'],
+        'Channel_ID': channel_details['channel_id'],
+        'Search Niche': niche,
+        'Channel_Image_URL': channel_details['channel_image_url'],
+        **_VIEWSTATS_EMPTY
+    }
+
 
-    return row
+class LogBuf:
+    """Collect progress lines and write them to stdout in chunks instead of one print per line"""
 
+    def __init__(self, n=50):
+        self.buf = []
+        self.n = n
 
-def scrape_channels_by_niche(niche, min_subs, max_subs, country_filter=None, target_creators=10):
+    def add(self, msg):
+        self.buf.append(msg)
+        if len(self.buf) >= self.n:
+            self.flush()
+
+    def flush(self):
+        if self.buf:
+            sys.stdout.write('\n'.join(self.buf) + '\n')
+            self.buf.clear()
+
+
+async def scrape_channels_by_niche(niche, min_subs, max_subs, country_filter=None, target_creators=10):
     """Main scraping function that searches channels by niche with quota optimization"""
     # Load existing database
-    database_df = load_or_create_database()
+    database_df, indexes = load_or_create_database()
+    id_index = indexes['channel_id']
+    niche_words = indexes['niche_words']
 
     next_page_token = None
     new_results = []
     updated_channels = 0
+    pending_niche_updates = {}  # Row index -> updated niches, applied in one assignment after the search
+    ids_backfilled = 0
     pages_searched = 0
     max_pages = 15  # Limit pages to control quota usage
+    recent_yields = deque(maxlen=3)  # New channels found on each of the last 3 pages
+    min_recent_yield = 6  # Stop searching when the last 3 pages found fewer new channels than this
     channels_processed = 0
+    skip = stats['skip_reasons']
+    skipped = 0  # Written back to stats['channels_skipped'] once the search ends
 
     print(f"🎯 Searching for channels in niche: {niche}")
     print(f"📊 Target: {target_creators} NEW channels with {min_subs:,} - {max_subs:,} subscribers")
     if country_filter:
         print(f"🌍 Country filter: {country_filter}")
 
-    while len(new_results) < target_creators and pages_searched < max_pages:
-        print(f"🔍 Searching page {pages_searched + 1}... (Quota used: {stats['quota_used']})")
+    # One pooled session for every API call in this run, keeping connections alive between search pages so
+    # details batches reuse the open TLS connections instead of handshaking again
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_REQUESTS, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                                     ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        pending_search = None  # Next search page, fetched while the current page is processed
 
+        log = LogBuf()
         try:
-            response = search_channels_by_keyword(niche, page_token=next_page_token, max_results=50)
-            pages_searched += 1
-
-            channel_items = response.get('items', [])
-            if not channel_items:
-                print("❌ No more channels found")
-                break
-
-            # Extract channel IDs from search results
-            channel_ids = [item['id']['channelId'] for item in channel_items]
-            stats['total_channels_found'] += len(channel_ids)
-
-            if not channel_ids:
-                print("⚠️ No valid channel IDs found on this page")
-                next_page_token = response.get('nextPageToken')
-                if not next_page_token:
-                    break
-                continue
-
-            # Get detailed channel information in batches
-            detailed_channels = get_channels_batch_optimized(channel_ids)
-
-            for channel_item in detailed_channels:
-                channels_processed += 1
-                channel_details = process_channel_data(channel_item)
-
-                if not channel_details:
-                    stats['channels_skipped'] += 1
-                    stats['skip_reasons']['Processing Error'] += 1
-                    continue
-
-                # Check if channel already exists in database
-                existing_index = find_existing_channel(channel_details['username'], channel_details['channel_url'],
-                                                       database_df)
-
-                if existing_index is not None:
-                    # Channel exists - update niche instead of skipping
-                    existing_niches = database_df.at[existing_index, 'Search Niche']
-                    updated_niches = add_niche_to_existing(existing_niches, niche)
-
-                    if updated_niches != existing_niches:
-                        database_df.at[existing_index, 'Search Niche'] = updated_niches
-                        updated_channels += 1
-                        print(f"🔄 Updated: {channel_details['username']} - added '{niche}' to niches")
+            while len(new_results) < target_creators and pages_searched < max_pages:
+                log.add(f"🔍 Searching page {pages_searched + 1}... (Quota used: {stats['quota_used']})")
+                results_before_page = len(new_results)
+
+                try:
+                    if pending_search is not None:
+                        response = await pending_search
+                        pending_search = None
                     else:
-                        print(
-                            f"ℹ️  No update needed: {channel_details['username']} - niche already contains all keywords")
-
-                    continue
-
-                # Apply subscriber filter
-                if not (min_subs <= channel_details['subscribers'] <= max_subs):
-                    stats['channels_skipped'] += 1
-                    stats['skip_reasons']['Subscribers outside range'] += 1
-                    continue
-
-                # Apply country filter if specified
-                if country_filter and channel_details['country'].upper() != country_filter.upper():
-                    stats['channels_skipped'] += 1
-                    stats['skip_reasons']['Country mismatch'] += 1
-                    continue
-
-                # Create database row for new channel
-                print(f"✅ Found NEW: {channel_details['username']} ({channel_details['subscribers']:,} subs)")
-                database_row = create_database_row(channel_details, niche)
-                new_results.append(database_row)
-
-                # Check if we've found enough creators
-                if len(new_results) >= target_creators:
-                    print(f"🎉 Found {target_creators} new matching channels!")
+                        response = await search_channels_by_keyword(session, semaphore, niche,
+                                                                    page_token=next_page_token, max_results=50)
+                    pages_searched += 1
+
+                    channel_items = response.get('items', [])
+                    if not channel_items:
+                        log.add("❌ No more channels found")
+                        break
+
+                    # Extract channel IDs from search results
+                    channel_ids = [item['id']['channelId'] for item in channel_items]
+                    stats['total_channels_found'] += len(channel_ids)
+                    next_page_token = response.get('nextPageToken')
+
+                    if not channel_ids:
+                        log.add("⚠️ No valid channel IDs found on this page")
+                        if not next_page_token:
+                            break
+                        continue
+
+                    # Channels already in the database only need their niche updated, no details call
+                    new_ids = []
+                    for channel_id in channel_ids:
+                        existing_index = id_index.get(channel_id)
+                        if existing_index is None:
+                            new_ids.append(channel_id)
+                        elif update_existing_niche(pending_niche_updates, niche_words, existing_index, niche):
+                            updated_channels += 1
+                            username = database_df.at[existing_index, 'Username']
+                            log.add(f"🔄 Updated: {username} - added '{niche}' to niches")
+
+                    # Details batches not requested because their channels were already known
+                    stats['quota_saved_by_cache'] += count_batches(channel_ids) - count_batches(new_ids)
+
+                    # If this page can't reach the target even if every new channel matches, the next page is
+                    # needed anyway - search for it while this page's details are fetched. Not when a low yield on
+                    # this page could end the search on diminishing returns, that search would be paid for and
+                    # thrown away
+                    window_rest = list(recent_yields)[-(recent_yields.maxlen - 1):]
+                    may_short_circuit = (len(window_rest) == recent_yields.maxlen - 1 and
+                                         sum(window_rest) < min_recent_yield)
+                    if (next_page_token and pages_searched < max_pages and not may_short_circuit and
+                            len(new_results) + len(new_ids) < target_creators):
+                        pending_search = asyncio.ensure_future(search_channels_by_keyword(
+                            session, semaphore, niche, page_token=next_page_token, max_results=50))
+
+                    # Get detailed channel information in batches, only for channels we don't know yet
+                    detailed_channels = await get_channels_batch_optimized(session, semaphore, new_ids)
+
+                    # Match details back by ID, the API doesn't promise to keep the request order
+                    by_id = {channel_item['id']: channel_item for channel_item in detailed_channels}
+
+                    # Parse the whole batch first so the subscriber and country filters run over it at once
+                    batch_details = []
+                    for channel_id in new_ids:
+                        channel_item = by_id.get(channel_id)
+                        if channel_item is None:
+                            skipped += 1
+                            skip['Missing detail'] += 1
+                            continue
+
+                        channels_processed += 1
+                        channel_details = process_channel_data(channel_item)
+
+                        if not channel_details:
+                            skipped += 1
+                            skip['Processing Error'] += 1
+                            continue
+
+                        batch_details.append(channel_details)
+
+                    subs_ok, country_ok = filter_channel_batch(batch_details, min_subs, max_subs, country_filter)
+
+                    for channel_details, in_subs_range, country_matches in zip(batch_details, subs_ok, country_ok):
+                        # Check if channel already exists in database
+                        existing_index = find_existing_channel(channel_details['username'],
+                                                               channel_details['channel_url'],
+                                                               indexes['username'], indexes['url'])
+
+                        if existing_index is not None:
+                            # Channel exists - remember its ID so later searches skip the details call
+                            if id_index.get(channel_details['channel_id']) != existing_index:
+                                database_df.at[existing_index, 'Channel_ID'] = channel_details['channel_id']
+                                id_index[channel_details['channel_id']] = existing_index
+                                ids_backfilled += 1
+
+                            # Update niche instead of skipping
+                            if update_existing_niche(pending_niche_updates, niche_words, existing_index, niche):
+                                updated_channels += 1
+                                log.add(f"🔄 Updated: {channel_details['username']} - added '{niche}' to niches")
+                            else:
+                                log.add(f"ℹ️  No update needed: {channel_details['username']} - "
+                                        f"niche already contains all keywords")
+
+                            continue
+
+                        # Apply subscriber filter
+                        if not in_subs_range:
+                            skipped += 1
+                            skip['Subscribers outside range'] += 1
+                            continue
+
+                        # Apply country filter if specified
+                        if not country_matches:
+                            skipped += 1
+                            skip['Country mismatch'] += 1
+                            continue
+
+                        # Create database row for new channel
+                        log.add(f"✅ Found NEW: {channel_details['username']} "
+                                f"({channel_details['subscribers']:,} subs)")
+                        database_row = create_database_row(channel_details, niche)
+                        new_results.append(database_row)
+
+                        # Check if we've found enough creators
+                        if len(new_results) >= target_creators:
+                            log.add(f"🎉 Found {target_creators} new matching channels!")
+                            break
+
+                    # Early exit if we have enough results
+                    if len(new_results) >= target_creators:
+                        break
+
+                    # Later search pages are less relevant, stop once they mostly return known or filtered channels
+                    recent_yields.append(len(new_results) - results_before_page)
+                    if len(recent_yields) == recent_yields.maxlen and sum(recent_yields) < min_recent_yield:
+                        log.add(f"📉 Diminishing returns: only {sum(recent_yields)} new channels on the last "
+                                f"{recent_yields.maxlen} pages, stopping search")
+                        stats['pages_short_circuited'] += 1
+                        break
+
+                    if not next_page_token:
+                        log.add("📄 No more pages available")
+                        break
+
+                except Exception as e:
+                    log.add(f"❌ Error during search: {e}")
                     break
+        finally:
+            # Print whatever is still buffered, even if the loop was interrupted
+            log.flush()
+            stats['channels_skipped'] += skipped
 
-            # Early exit if we have enough results
-            if len(new_results) >= target_creators:
-                break
+        # A prefetched page is left over if the search stopped early, e.g. on an error or a cancelled run
+        if pending_search is not None:
+            pending_search.cancel()
 
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                print("📄 No more pages available")
-                break
-
-        except Exception as e:
-            print(f"❌ Error during search: {e}")
-            break
+    # Apply niche updates for existing channels in one vectorized assignment
+    if pending_niche_updates:
+        idx = list(pending_niche_updates)
+        database_df.loc[idx, 'Search Niche'] = [pending_niche_updates[i] for i in idx]
 
     # Add new results to database
     if new_results:
         new_df = pd.DataFrame(new_results)
+        new_df['_username_lower'] = new_df['Username'].str.lower()
+
+        # Keep Country categorical, registering countries the database hasn't seen yet
+        known_countries = database_df['Country'].cat.categories
+        database_df['Country'] = database_df['Country'].cat.add_categories(
+            [c for c in new_df['Country'].unique() if c not in known_countries])
+        new_df['Country'] = new_df['Country'].astype(database_df['Country'].dtype)
 
         # Fix for pandas FutureWarning - check if database is empty
         if database_df.empty:
@@ -370,9 +622,13 @@ def scrape_channels_by_niche(niche, min_subs, max_subs, country_filter=None, tar
 
         database_df = updated_database
 
+        # Keep the lookups in step with the new rows
+        add_to_indexes(indexes, database_df.iloc[-len(new_df):])
+
     # Save database (whether we added new channels or just updated existing ones)
-    if new_results or updated_channels > 0:
-        save_database(database_df)
+    if new_results or updated_channels > 0 or ids_backfilled > 0:
+        save_database(database_df, new_rows=new_results,
+                      updated=bool(pending_niche_updates) or ids_backfilled > 0)
         if new_results:
             print(f"✅ Added {len(new_results)} new channels to database")
         if updated_channels > 0:
@@ -401,7 +657,7 @@ def print_statistics(results):
 
     total_api_calls = stats['api_calls_search'] + stats['api_calls_batch']
     print(f"🔍 API calls: {total_api_calls} ({stats['api_calls_search']} search + {stats['api_calls_batch']} batch)")
-    print(f"💰 Quota used: {stats['quota_used']} units")
+    print(f"💰 Quota used: {stats['quota_used']} units ({stats['quota_saved_by_cache']} saved by known channel IDs)")
     print(f"📦 NEW Channels: {len(results)} added")
     print(f"🔄 Updated Channels: {stats['channels_updated']} niche updates")
     print(f"⏭️  Skipped Channels: {stats['channels_skipped']}")
@@ -425,7 +681,9 @@ def get_popular_niches():
 
 def sanitize_filename(text):
     """Clean filename for safe file saving"""
-    return re.sub(r'[^a-zA-Z0-9_]', '_', text)
+    if text.isascii():
+        return text.translate(_SAFE_TRANS)
+    return _SAFE_RE.sub('_', text)
 
 
 if __name__ == '__main__':
@@ -458,7 +716,7 @@ if __name__ == '__main__':
     print(f"\n🔍 Searching for {target_creators} NEW channels in '{niche}' niche...")
 
     try:
-        results = scrape_channels_by_niche(niche, min_subs, max_subs, country_filter, target_creators)
+        results = asyncio.run(scrape_channels_by_niche(niche, min_subs, max_subs, country_filter, target_creators))
 
         if results or stats['channels_updated'] > 0:
             print(f"🎉 Success!")